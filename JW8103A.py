@@ -17,6 +17,7 @@
     - 读取4通道功率值（dBm和mW）
     - 设置/读取用户波长
     - 屏幕数据读取
+    - 功率与屏幕数据批量读取（单次往返）
     - 校准功能
 
 类:
@@ -26,66 +27,42 @@
     ToI32: 16进制字符串转32位有符号整数
     ToI16: 16进制字符串转16位有符号整数
     ToFloat: 16进制字符串转浮点数
-    ToHex: 整数转16进制字符串
 """
 
+import contextlib
 import struct
-import bitstring
 from typing import Literal
 import time
 import threading
+import numpy as np
+
+
+# 用户功率值应答中4个通道的小端32位有符号整数
+_POWER_UNPACK = struct.Struct("<4i").unpack_from
+# 屏幕数据中单个通道的布局：波长索引(1字节) + 功率(4字节) + 参考值(4字节)
+_SCREEN_DTYPE = np.dtype([("wave", "u1"), ("power", "<i4"), ("ref", "<i4")])
 
 
 def ToI32(hex_str:str) -> int:
     """
-    16进制字符串转换为32位无符号整数\n"""
-    hex_str = hex_str.upper()
-    # 按字节反序
-    temp = ""
-    for i in range(len(hex_str), 0, -2):
-        temp += hex_str[i-2:i]
-    hex_str = temp
-    # 转换为有符号32位整数
-    unsigned_num = int(hex_str, 16)
-    if unsigned_num & 0x80000000:
-        signed_num = unsigned_num - 0x100000000
-    else:
-        signed_num = unsigned_num
-    return signed_num
+    16进制字符串(小端)转换为32位有符号整数\n"""
+    return int.from_bytes(bytes.fromhex(hex_str), 'little', signed=True)
 
 
 def ToI16(hex_str:str) -> int:
     """
-    4字节16进制字符串转换为16位有符号整数\n"""
-    hex_str = hex_str.upper()
-    # 按字节反序
-    temp = ""
-    for i in range(len(hex_str), 0, -2):
-        temp += hex_str[i-2:i]
-    hex_str = temp
-    # 转换为有符号16位整数
-    unsigned_num = int(hex_str, 16)
-    if unsigned_num & 0x8000:
-        signed_num = unsigned_num - 0x10000
-    else:
-        signed_num = unsigned_num
-    return signed_num
+    4字节16进制字符串(小端)转换为16位有符号整数\n"""
+    return int.from_bytes(bytes.fromhex(hex_str), 'little', signed=True)
 
 
 def ToFloat(hex_str:str) -> float:
     """
     4字节16进制字符串转换为浮点数\n"""
-    hex_str = hex_str.upper()
     bytes_data = bytes.fromhex(hex_str)
     float_data = struct.unpack('<f', bytes_data)[0]
     return float_data
 
 
-def ToHex(num:int, size:int) -> str:
-    hex_str = num.to_bytes(size, byteorder='little', signed=True).hex().upper()
-    return hex_str
-
-
 class JW8103A:
     """
     嘉慧JW8103A/JW8102A光功率计控制类
@@ -100,7 +77,9 @@ class JW8103A:
         
     属性:
         ser: 串口对象
-        ser_lock: 串口操作锁，确保线程安全
+        _lock: 串口操作锁，thread_safe为False时为空上下文
+        _frames: 无数据命令的预组装帧，{命令码: 帧字节}
+        _wave_lut: 波长查找表，{索引/波长: 索引}
         WaveToIndex: 波长到索引的映射字典
         IndexToWave: 索引到波长的映射字典
         
@@ -118,27 +97,40 @@ class JW8103A:
     header = "7B"  # 帧头 '{'
     footer = "7D"  # 帧尾 '}'
     ID = "FF"      # 广播地址
-    ser_lock = threading.Lock()  # 串口操作锁，确保多线程安全
-    
-    # 协议帧模板
-    protocol = {"帧头":header, "地址":ID, "长度":None, "命令":None, "数据":None, "校验":None, "帧尾":footer}
     
     # 标准波长与索引的映射（设备内置6个标准波长）
     WaveToIndex = {"850":1, "1300":2, "1310":3, "1490":4, "1550":5, "1625":6}
     IndexToWave = {1:"850", 2:"1300", 3:"1310", 4:"1490", 5:"1550", 6:"1625"}
 
-    def __init__(self, ser):
+    # 不带数据的命令码，其完整帧在初始化时预先组装
+    NO_DATA_CMDS = ("0140", "0142", "0162", "0164", "014A", "0730")
+    # 设备内置6个标准波长的小端编码，设置用户波长时需放在新增波长之前
+    STD_WAVES = struct.pack("<6h", 850, 1300, 1310, 1490, 1550, 1625)
+
+    def __init__(self, ser, thread_safe=True):
         """
         JW8103A类初始化\n
-        :param ser: 串口对象，用于与硬件通信\n"""
+        :param ser: 串口对象，用于与硬件通信\n
+        :param thread_safe: 是否对串口操作加锁，仅单线程访问时可设为False\n"""
         self.ser = ser
+        self._lock = threading.Lock() if thread_safe else contextlib.nullcontext()
+        # 复制类级别的波长映射，读取用户波长时只修改本实例的映射
+        self.WaveToIndex = dict(self.WaveToIndex)
+        self.IndexToWave = dict(self.IndexToWave)
+        self._frames = {cmd: self.make_cmd(cmd, b"") for cmd in self.NO_DATA_CMDS}
+        self._read_all_frame = self._frames["0162"] + self._frames["0164"] + self._frames["014A"]
+        # 波长查找表：索引、整数波长、字符串波长均映射到波长索引
+        self._wave_lut = {}
+        for index, wave in self.IndexToWave.items():
+            self._wave_lut[index] = index
+            self._wave_lut[int(wave)] = index
+            self._wave_lut[wave] = index
 
     def Connect(self):
         """"连接"""
-        with self.ser_lock:
-            cmd = self.make_cmd("0140", "")
-            self.ser.write(cmd)
-            result = self.ser.read(11).hex()
+        with self._lock:
+            self.ser.write(self._frames["0140"])
+            result = self.ser.read(11)
             if result:
                 return True
             else:
@@ -148,15 +140,12 @@ class JW8103A:
     def Calibration_Power(self) -> list:
         """读取校准功率功率值\n
         返回4个通道的功率值"""
-        with self.ser_lock:
-            cmd = self.make_cmd("0142", "")
-            self.ser.write(cmd)
-            bytes = self.ser.read(15).hex()
-            result = []
-            if len(bytes) != 0:
-                for i in range(10, len(bytes)-4, 4):
-                    result.append(ToI32(bytes[i:i+4])/1000)
-            return result
+        with self._lock:
+            self.ser.write(self._frames["0142"])
+            raw = self.ser.read(15)
+            if len(raw) != 15:
+                return []
+            return (np.frombuffer(raw, dtype="<i2", count=4, offset=5) / 1000).tolist()
 
 
     def Calibration_Wavelength(self, CH:Literal[1,2,3,4], Wavelength:int):
@@ -164,9 +153,9 @@ class JW8103A:
         :param CH: 通道号，1~4\n
         :param Wavelength: 波长，单位nm
         可以使用标准波长索引850,1300,1310，1490,1550,1625 一共6个波长对应索引1到6"""
-        with self.ser_lock:
-            self.ser.write(self.make_cmd("0144", f"{ToHex(CH, 1)}{ToHex(Wavelength, 1)}"))
-            result = self.ser.read(7).hex()
+        with self._lock:
+            self.ser.write(self.make_cmd("0144", struct.pack("<BB", CH, Wavelength)))
+            result = self.ser.read(7)
             if result:
                 return True
             else:
@@ -178,15 +167,12 @@ class JW8103A:
         :param CH: 通道号，1~4\n
         :param Wavelength: 波长，单位nm
         可以使用标准波长索引850,1300,1310，1490,1550,1625 一共6个波长对应索引1到6"""
-        with self.ser_lock:
-            if Wavelength in self.IndexToWave.keys():
-                Wavelength = Wavelength
-            elif Wavelength in self.WaveToIndex.keys():
-                Wavelength = self.WaveToIndex[Wavelength]
-            else:
-                return False
-            self.ser.write(self.make_cmd("0160", f"{ToHex(CH, 1)}{ToHex(Wavelength, 1)}"))
-            result = self.ser.read(7).hex()
+        Wavelength = self._wave_lut.get(Wavelength)
+        if Wavelength is None:
+            return False
+        with self._lock:
+            self.ser.write(self.make_cmd("0160", struct.pack("<BB", CH, Wavelength)))
+            result = self.ser.read(7)
             if result:
                 # print(result)
                 return True
@@ -197,22 +183,17 @@ class JW8103A:
     def Read_User_Power(self) -> list:
         """读取用户功率值\n
         返回4个通道的功率值"""
-        with self.ser_lock:
-            self.ser.write(self.make_cmd("0162", ""))
-            bytes = self.ser.read(23).hex()
-            result = []
-            if len(bytes) != 0:
-                for i in range(10, len(bytes)-4, 8):
-                    result.append(ToI32(bytes[i:i+8])/1000)
-            return result
+        with self._lock:
+            self.ser.write(self._frames["0162"])
+            return self._parse_user_power(self.ser.read(23))
     
 
     def Absolute_PowerDeviationValue(self, Value:float):
         """设置绝对功率偏差值\n
         :param Value: 偏差值，单位dBm"""
-        with self.ser_lock:
-            self.ser.write(self.make_cmd("0166", ToHex(int(Value*1000), 4)))
-            result = self.ser.read(7).hex()
+        with self._lock:
+            self.ser.write(self.make_cmd("0166", struct.pack("<i", int(Value*1000))))
+            result = self.ser.read(7)
             if result:
                 return True
             else:
@@ -222,26 +203,20 @@ class JW8103A:
     def Read_User_Power_mw(self) -> list:
         """读取用户mw数据\n
         返回4个通道的mw数据"""
-        with self.ser_lock:
-            self.ser.write(self.make_cmd("0164", ""))
-            bytes = self.ser.read(23).hex()
-            print(bytes)
-            result = []
-            if len(bytes) != 0:
-                for i in range(10, len(bytes)-4, 8):
-                    result.append(ToFloat(bytes[i:i+8]))
-            return result
+        with self._lock:
+            self.ser.write(self._frames["0164"])
+            return self._parse_user_power_mw(self.ser.read(23))
     
 
     def Write_Wavelength(self, Wavelength:float):
         """设置测量波长\n
         :param Wavelength: 测量波长，单位nm
         写入波长范围850.00---1625.00"""
-        with self.ser_lock:
+        with self._lock:
             if Wavelength < 850.00 or Wavelength > 1625.00:
                 return False
-            self.ser.write(self.make_cmd("0146", ToHex(int(Wavelength*100), 4)))
-            result = self.ser.read(7).hex()
+            self.ser.write(self.make_cmd("0146", struct.pack("<i", int(Wavelength*100))))
+            result = self.ser.read(7)
             if result:
                 return True
             else:
@@ -252,9 +227,9 @@ class JW8103A:
         """设置参考电压\n
         :param CH: 通道号，1~4\n
         :param REF: 参考电压，单位V"""
-        with self.ser_lock:
-            self.ser.write(self.make_cmd("0148", f"{ToHex(CH, 1)}{ToHex(int(REF*1000), 4)}"))
-            result = self.ser.read(7).hex()
+        with self._lock:
+            self.ser.write(self.make_cmd("0148", struct.pack("<Bi", CH, int(REF*1000))))
+            result = self.ser.read(7)
             if result:
                 return True
             else:
@@ -264,38 +239,82 @@ class JW8103A:
     def Read_Screen_Data(self) -> dict:
         """读取屏幕数据\n
         返回4个通道的屏幕数据"""
-        with self.ser_lock:
-            self.ser.write(self.make_cmd("014A", ""))
-            bytes = self.ser.read(43).hex()
-            channels = None
-            if len(bytes) != 0:
-                channels = {"CH1":{"Wavelength":None, "Power":None, "REF":None}, 
-                            "CH2":{"Wavelength":None, "Power":None, "REF":None}, 
-                            "CH3":{"Wavelength":None, "Power":None, "REF":None}, 
-                            "CH4":{"Wavelength":None, "Power":None, "REF":None}}
-                channels_num = 1
-                for i in range(10, len(bytes)-4, 18):
-                    channels[f"CH{channels_num}"]["Wavelength"] = self.IndexToWave[int(bytes[i:i+2], 16)]
-                    channels[f"CH{channels_num}"]["Power"] = ToI32(bytes[i+2:i+10])/1000
-                    channels[f"CH{channels_num}"]["REF"] = ToI32(bytes[i+10:i+18])/1000
-                    channels_num += 1
-            return channels
+        with self._lock:
+            self.ser.write(self._frames["014A"])
+            return self._parse_screen_data(self.ser.read(43))
+
+
+    def Read_All(self) -> dict:
+        """一次往返读取用户功率值、mw数据和屏幕数据\n
+        三条命令连续写出后一次读回全部应答，减少串口往返次数\n
+        返回{"Power": 功率值列表, "Power_mw": mw数据列表, "Screen": 屏幕数据字典}"""
+        with self._lock:
+            self.ser.write(self._read_all_frame)
+            raw = self.ser.read(23 + 23 + 43)
+        # 三帧按固定偏移切分，逐帧校验帧头/地址/长度/命令/帧尾，不匹配的帧按读取失败处理
+        result = {"Power": [], "Power_mw": [], "Screen": None}
+        if self._frame_ok(raw, 0, "0162", 23):
+            result["Power"] = self._parse_user_power(raw[:23])
+        if self._frame_ok(raw, 23, "0164", 23):
+            result["Power_mw"] = self._parse_user_power_mw(raw[23:46])
+        if self._frame_ok(raw, 46, "014A", 43):
+            result["Screen"] = self._parse_screen_data(raw[46:89])
+        return result
+
+
+    def _frame_ok(self, raw:bytes, start:int, cmd:str, size:int) -> bool:
+        """检查raw中从start开始的size字节是否为命令cmd的完整应答帧"""
+        end = start + size
+        return (len(raw) >= end
+                and raw[start] == 0x7B and raw[start + 1] == 0xFF
+                and raw[start + 2] == size - 2
+                and raw[start + 3:start + 5] == bytes.fromhex(cmd)
+                and raw[end - 1] == 0x7D)
+
+
+    def _parse_user_power(self, raw:bytes) -> list:
+        """解析读取用户功率值(0162)的23字节应答"""
+        if len(raw) != 23:
+            return []
+        a, b, c, d = _POWER_UNPACK(raw, 5)
+        return [a/1000, b/1000, c/1000, d/1000]
+
+
+    def _parse_user_power_mw(self, raw:bytes) -> list:
+        """解析读取用户mw数据(0164)的23字节应答"""
+        if len(raw) != 23:
+            return []
+        return np.frombuffer(raw, dtype="<f4", count=4, offset=5).tolist()
+
+
+    def _parse_screen_data(self, raw:bytes) -> dict:
+        """解析读取屏幕数据(014A)的43字节应答"""
+        if len(raw) != 43:
+            return None
+        data = np.frombuffer(raw, dtype=_SCREEN_DTYPE, count=4, offset=5)
+        waves = data["wave"].tolist()
+        powers = (data["power"] / 1000).tolist()
+        refs = (data["ref"] / 1000).tolist()
+        channels = {}
+        for i in range(4):
+            channels[f"CH{i+1}"] = {"Wavelength":self.IndexToWave[waves[i]], "Power":powers[i], "REF":refs[i]}
+        return channels
         
 
     def Set_User_Wavelength(self, Count:int, Wavelengths:list[int]):
         """设置用户波长\n
         :param Count:波长总数，最大32波长,默认占用前六个，使用该指令时只需输入新增个数\n
         :param Wavelength: 波长，单位nm, 850---1625, 两字节十六进制字符串整型，只需输入新增波长个数的波长值即可\n"""
-        with self.ser_lock:
+        with self._lock:
             if Count > 28:
                 return False
-            data = ""
+            data = b""
             for wavelength in Wavelengths:
                 if wavelength < 850 or wavelength > 1625:
                     return False
-                data = data + ToHex(wavelength, 2)
-            self.ser.write(self.make_cmd("0732", f"{ToHex((Count+6), 1)}520314051E05D2050E065906{data}"))
-            result = self.ser.read(7).hex()
+                data = data + struct.pack("<h", wavelength)
+            self.ser.write(self.make_cmd("0732", struct.pack("<B", Count+6) + self.STD_WAVES + data))
+            result = self.ser.read(7)
             if result:
                 return True
             else:
@@ -305,62 +324,52 @@ class JW8103A:
     def Read_User_Wavelength(self) -> list:
         """读取用户波长\n
         返回用户波长列表"""
-        with self.ser_lock:
-            self.ser.write(self.make_cmd("0730", ""))
-            bytes = b''
-            # time.sleep(0.01)
-            while not self.ser.in_waiting:
-                pass
-            while self.ser.in_waiting:
-                bytes += self.ser.read()
-            bytes = bytes.hex().upper()
-            result = []
-            if len(bytes) != 0:
-                for i in range(12, len(bytes)-4, 4):
-                    result.append(ToI16(bytes[i:i+4]))
-            for i in range(int(bytes[10:12])):
-                self.IndexToWave[i+1] = f"{result[i]:.2f}"
-                self.WaveToIndex[f"{result[i]:.2f}"] = i+1
+        with self._lock:
+            self.ser.write(self._frames["0730"])
+            # 先读帧头、地址、长度，再按长度字段一次读完剩余字节
+            raw = self.ser.read(3)
+            if len(raw) == 3:
+                raw += self.ser.read(raw[2] - 1)
+            if len(raw) < 8:
+                return []
+            # 帧头(5字节) + 波长个数(1字节) + 波长(每个2字节) + 校验 + 帧尾
+            result = np.frombuffer(raw, dtype="<i2", count=(len(raw)-8)//2, offset=6).tolist()
+            for i in range(raw[5]):
+                wave = format(result[i], ".2f")
+                self.IndexToWave[i+1] = wave
+                self.WaveToIndex[wave] = i+1
+                self._wave_lut[i+1] = i+1
+                self._wave_lut[result[i]] = i+1
+                self._wave_lut[wave] = i+1
             return result
 
 
-    def make_cmd(self, cmd:str, data:str) -> bytes:
+    def make_cmd(self, cmd:str, data:bytes) -> bytes:
         """
         组装命令\n
-        :param cmd: 2字节的十六进制字符串，命令码\n
-        :param data: 0~200字节的十六进制字符串，命令数据\n"""
-        self.protocol["命令"] = cmd.upper().zfill(4)
-        self.protocol["数据"] = data.upper() + '0' * (len(data) % 2)
-        self.protocol["长度"] = hex(len(data)//2 + 5)[2:].upper().zfill(2)
-        self.protocol["校验"] = self.check_sum(self.protocol).zfill(2)
-        cmd_str = ""
-        for key in self.protocol:
-            cmd_str += self.protocol[key]
-        return bitstring.BitArray(hex=cmd_str).bytes
+        :param cmd: 2字节的十六进制字符串，命令码，须为4位大写形式如"0162"\n
+        :param data: 0~200字节的命令数据\n"""
+        length = hex(len(data) + 5)[2:].zfill(2)
+        buf = bytes.fromhex(self.header + self.ID + length + cmd) + data
+        return buf + bytes([self.check_sum(buf)]) + bytes.fromhex(self.footer)
         
 
-    def check_sum(self, cmd_dict:dict) -> str:
+    def check_sum(self, buf:bytes) -> int:
         """
         计算校验和\n
-        :param cmd_dict: 字典，包含命令各字段的十六进制字符串\n"""
-        sum = 0
-        for key in cmd_dict:
-            if key!= "帧尾" and key!= "校验":
-                for i in range(0, len(cmd_dict[key]), 2):
-                    sum += int(cmd_dict[key][i:i+2], 16)
-        sum = ~sum
-        sum += 1
-        return hex(sum & 0xFF)[2:].upper().zfill(2)
+        :param buf: 除校验和帧尾外的帧字节\n"""
+        return -sum(memoryview(buf)) & 0xFF
     
     
 
+
 if __name__ == "__main__":
     import serial
     ser = serial.Serial("COM32", 115200, timeout=1)
     jw = JW8103A(ser)
-    # ser.write(jw.make_cmd("0732", "07520314051e05d2050e0659060406"))
-    # ser.write(jw.make_cmd("0730", ""))
-    # ser.write(jw.make_cmd("0160", "0107"))
+    # ser.write(jw.make_cmd("0732", bytes.fromhex("07520314051e05d2050e0659060406")))
+    # ser.write(jw.make_cmd("0730", b""))
+    # ser.write(jw.make_cmd("0160", bytes.fromhex("0107")))
     # print(jw.Read_User_Wavelength())
     # print(jw.Read_Screen_Data())
     # a = jw.User_Wavelength(1, 5)
@@ -368,4 +377,4 @@ if __name__ == "__main__":
     # while True:
     #     print(jw.Read_User_Power())
     #     time.sleep(0.5)
-    print(jw.make_cmd("0162", "").hex())
+    print(jw.make_cmd("0162", b"").hex())
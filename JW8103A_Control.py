@@ -26,13 +26,16 @@ from Ui_JW8103A_Control import Ui_MainWindow
 import serial
 import serial.tools.list_ports
 import time
-import datetime
 import os
 import threading
 import json
 import socket
+import itertools
+import configparser
+import math
 import pandas as pd
-from queue import Queue
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
 from JW8103A import JW8103A
 from tool import *
 from TCPClient import TCPClient
@@ -45,9 +48,45 @@ from PyQt5 import QtCore, QtGui, QtWidgets
 from PyQt5.QtWidgets import QMessageBox
 from PyQt5.QtCore import QThread, pyqtSignal, Qt
 
-VERSION = "Unknown" if not os.path.exists("更新内容.csv") or \
-                       pd.read_csv("更新内容.csv", header=None, index_col=None).iloc[-1, 0] is None \
-    else pd.read_csv("更新内容.csv", header=None, index_col=None).iloc[-1, 0]
+
+def read_version():
+    """读取更新日志最后一条记录的版本号，读取失败时返回Unknown"""
+    try:
+        with open("更新内容.csv", "rb") as f:
+            lines = [line for line in f.read().splitlines() if line.strip()]
+        return lines[-1].decode("utf-8", "ignore").split(",", 1)[0].strip() or "Unknown"
+    except (OSError, IndexError):
+        return "Unknown"
+
+
+VERSION = read_version()
+
+
+_LOCAL_IP = None  # 本机IP地址缓存
+_dumps = json.dumps  # 应答打包热路径使用的局部别名
+_PLOT_KEY = "功率"   # 通道曲线图的数据序列名
+
+
+def get_local_ip():
+    """获取本机IP地址，只在首次调用时解析主机名"""
+    global _LOCAL_IP
+    if _LOCAL_IP is None:
+        _LOCAL_IP = socket.gethostbyname(socket.gethostname())
+    return _LOCAL_IP
+
+
+def finite_or_none(value):
+    """将未采样时的无穷大初值转换为None，保证输出为合法JSON"""
+    return value if math.isfinite(value) else None
+
+
+def parse_port(text, default=1234):
+    """解析端口号文本，非数字或超出1~65535范围时返回默认端口"""
+    try:
+        port = int(text)
+    except ValueError:
+        return default
+    return port if 0 < port < 65536 else default
 
 
 def showAbout(self):
@@ -86,7 +125,6 @@ class JW8103A_Control(QtWidgets.QMainWindow, Ui_MainWindow):
     
     信号:
         value_update (list): 用于更新UI显示的功率值信号
-        value_save (list): 用于保存功率数据的信号
         
     属性:
         ser: 串口对象
@@ -98,7 +136,10 @@ class JW8103A_Control(QtWidgets.QMainWindow, Ui_MainWindow):
     
     # Qt信号定义
     value_update = pyqtSignal(list)  # 功率值更新信号，传递4通道功率列表
-    value_save = pyqtSignal(list)    # 功率值保存信号
+
+    # 预先编码的TCP请求，%d处填入请求id，避免每次请求调用json.dumps
+    _READ_POWER_CMD = '{"cmd":"Read_User_Power","id":%d}'
+    _CONNECT_CMD = '{"cmd":"Connect","id":%d}'
 
     def __init__(self, parent=None):
         super(JW8103A_Control, self).__init__(parent)
@@ -107,6 +148,10 @@ class JW8103A_Control(QtWidgets.QMainWindow, Ui_MainWindow):
         self.version.setText(f"版本：{VERSION}")
         self.init_config()
         self.conifg = read_config()
+        # 配置在内存中修改，退出时统一写回config.ini
+        self._config_lock = threading.Lock()
+        self._config_dirty = False
+        os.makedirs("./Record", exist_ok=True)  # 数据记录目录
 
         self.ser = serial.Serial()
         self.JW = None
@@ -114,6 +159,13 @@ class JW8103A_Control(QtWidgets.QMainWindow, Ui_MainWindow):
         self.Record_Thread = None
         self.start_record = False
         self.startTime = None
+        self._rec_fh = None   # 记录文件句柄，开始记录时打开
+        self._rec_buf = []    # 待写入记录文件的数据行
+        self._rec_flush_time = 0.0  # 上次写入记录文件的时间(time.monotonic)
+        self._rec_header = ""  # 记录文件表头，开始记录时根据通道名称生成
+        self._ts_sec = None    # 时间戳秒级部分缓存，见_timestamp_ms
+        self._ts_sec_str = ""
+        self._rec_lock = threading.Lock()  # 记录文件锁，采集线程写入与主线程开始/停止记录互斥
         self.stopped = True
         self.stopRecord = False
 
@@ -122,23 +174,39 @@ class JW8103A_Control(QtWidgets.QMainWindow, Ui_MainWindow):
         self.TCPServer = None
         self.TCPClient = None
 
-        self.hostip = socket.gethostbyname(socket.gethostname())
+        self.hostip = get_local_ip()
         self.host_ip.setText(self.hostip)
         self.hostport = 1234
 
-        self.autoip = self.conifg["Auto"]["address"] if self.conifg["Auto"]["address"] else socket.gethostbyname(socket.gethostname())
+        self.autoip = self.conifg["Auto"]["address"] if self.conifg["Auto"]["address"] else self.hostip
         self.autoport = self.conifg["Auto"]["port"] if self.conifg["Auto"]["port"] else 10005
         self.address = "127.0.0.1"
         self.port = 1234
+        # TCP命令分发表 {命令: 处理函数}，处理函数返回(IsSuccessful, Value, ErrorMessage)
+        self._server_handlers = {"Connect": self._server_connect,
+                                 "ConnectDevice": self._server_connect,
+                                 "Disconnect": self._server_disconnect,
+                                 "Set_Wavelength": self._server_set_wavelength,
+                                 "Read_User_Power": self._server_read_power,
+                                 "GetPower": self._server_read_power}
+        self._auto_handlers = {"GetPower": self._auto_get_power,
+                               "RecordCon": self._auto_record_con,
+                               "ConnectDevice": self._auto_connect_device,
+                               "check": self._auto_check}
         self.AutoServer = TCPServer(addr=self.autoip, port=self.autoport, func=self.Auto_server_rec)
         self.AutoServer.start()
 
-        self.ClientQ = Queue()
+        self._pending = {}      # 等待应答的TCP请求 {请求id: Future}
+        self._pending_lock = threading.Lock()
+        self._req_ids = itertools.count(1)
         self.CH_Value_dict = {0: self.CH1_Value, 1: self.CH2_Value, 2: self.CH3_Value, 3: self.CH4_Value}
         self.CH_max_dict = {0: self.CH1_max, 1: self.CH2_max, 2: self.CH3_max, 3: self.CH4_max}
         self.CH_min_dict = {0: self.CH1_min, 1: self.CH2_min, 2: self.CH3_min, 3: self.CH4_min}
-        self.Value_record = {0: {"max": -60, "min": None, "value": 0}, 1: {"max": -60, "min": None, "value": 0},
-                             2: {"max": -60, "min": None, "value": 0}, 3: {"max": -60, "min": None, "value": 0}}
+        # 各通道当前值/最大值/最小值，最大最小值以无穷大作为未采样的初值
+        self._records = [{"max": float("-inf"), "min": float("inf"), "value": 0} for _ in range(4)]
+        # GetPower应答模板，仅由自动化服务器线程原地更新并同步序列化
+        self._power_resp = {f"CH{i + 1}": {"Power": 0, "Max": None, "Min": None} for i in range(4)}
+        self._power_resp_items = tuple(zip(self._power_resp.values(), self._records))
         self.CH_Wave_dict = {0: self.CH1_wave, 1: self.CH2_wave, 2: self.CH3_wave, 3: self.CH4_wave}
         self.CH_Twave_dict = {0: self.CH1Twave, 1: self.CH2Twave, 2: self.CH3Twave, 3: self.CH4Twave}
         self.CH_PlotLayout_dict = {0: self.CH1_Plot_layout, 1: self.CH2_Plot_layout, 2: self.CH3_Plot_layout,
@@ -147,15 +215,26 @@ class JW8103A_Control(QtWidgets.QMainWindow, Ui_MainWindow):
         self.CH_Plot_dict = {0: None, 1: None, 2: None, 3: None}
 
         for i in range(4):
-            self.CH_Plot_dict[i] = MyPlot({"功率": [0]})
+            self.CH_Plot_dict[i] = MyPlot({_PLOT_KEY: [0]})
             self.CH_PlotLayout_dict[i].addWidget(self.CH_Plot_dict[i])
 
+        # update_value热路径使用的通道控件元组，按通道下标直接索引
+        self._value_widgets = (self.CH1_Value, self.CH2_Value, self.CH3_Value, self.CH4_Value)
+        self._max_widgets = (self.CH1_max, self.CH2_max, self.CH3_max, self.CH4_max)
+        self._min_widgets = (self.CH1_min, self.CH2_min, self.CH3_min, self.CH4_min)
+        self._plots = tuple(self.CH_Plot_dict[i] for i in range(4))
+
         self.startIndex = 0  # 开始记录的数据下标
         self.setCHwave_dict = {0: self.setCH1wave, 1: self.setCH2wave, 2: self.setCH3wave, 3: self.setCH4wave}
         self.portInfo.setReadOnly(True)
+        # 限制日志行数，避免长时间运行时文本无限增长
+        self.portInfo.document().setMaximumBlockCount(500)
+        self.TCPInfo.document().setMaximumBlockCount(500)
         self.value_update.connect(self.update_value)
-        self.value_save.connect(self.save_value)
-        self.Power_Buffer = []
+        # 最新一次采样的4通道功率，采集线程原地覆盖，TCP服务线程加锁读取快照
+        self._power_buffer = [0.0] * 4
+        self._power_valid = False  # 是否已有采样，首次采样前应答空列表
+        self._power_lock = threading.Lock()
         self.CheckPort_callback()
 
         self.init_btn()
@@ -169,6 +248,28 @@ class JW8103A_Control(QtWidgets.QMainWindow, Ui_MainWindow):
                 f.write("[Auto]\naddress = 127.0.0.1\nport = 10005\n")
             
 
+    def set_config(self, section, key, value):
+        """修改内存中的配置项，实际写盘在flush_config中进行
+
+        Args:
+            section: 配置节名
+            key: 配置键名
+            value: 要设置的值（字符串）
+        """
+        with self._config_lock:
+            if self.conifg is None:
+                self.conifg = configparser.ConfigParser()
+            if not self.conifg.has_section(section):
+                self.conifg.add_section(section)
+            self.conifg.set(section, key, value)
+            self._config_dirty = True
+
+    def flush_config(self):
+        """将修改过的配置写回config.ini"""
+        with self._config_lock:
+            if self._config_dirty and write_config(self.conifg):
+                self._config_dirty = False
+
     def init_btn(self):
         """初始化界面按钮的信号与槽连接"""
         self.version.clicked.connect(lambda: showAbout(self))
@@ -232,27 +333,20 @@ class JW8103A_Control(QtWidgets.QMainWindow, Ui_MainWindow):
         Returns:
             bool: 打开成功返回True，失败返回False
         """
-        if not check_is_FTDI_port(self.Com.currentText()):
+        port = self.Com.currentText()
+        if not check_is_FTDI_port(port):
             if alert:
                 QMessageBox.warning(self, "警告", "请选择正确的端口！", QMessageBox.Yes)
             return False
-        else:
-            SetLatencyTimer(self.Com.currentText(), 1)
-        self.ser.port = self.Com.currentText()
+        SetLatencyTimer(port, 1)
+        self.ser.port = port
         self.ser.baudrate = 115200
         try:
             self.data_source = "Port"
             self.ser.open()
             self.updateInfo("端口打开成功！")
-            edit_config("Port", "name", self.ser.port)
-            self.hostport = int(self.host_port.text()) if self.host_port.text().isdigit() and int(
-                self.host_port.text()) > 0 and int(self.host_port.text()) < 65536 else 1234
-            self.TCPServer = TCPServer(addr=self.hostip, port=self.hostport, func=self.Server_update_device_rec)
-            self.TCPServer.ready_signal.connect(self.Server_ready_callback)
-            self.TCPServer.start()
-            discovery_thread = threading.Thread(target=LAN_Search.start_discovery_server, args=(self.hostport, "JW8103A_Control", ))
-            discovery_thread.daemon = True
-            discovery_thread.start()
+            self.set_config("Port", "name", self.ser.port)
+            self.start_host_server()
             self.btn_group_enable(True)
             return True
         except Exception as e:
@@ -268,10 +362,22 @@ class JW8103A_Control(QtWidgets.QMainWindow, Ui_MainWindow):
             self.RestartHost.setEnabled(True)
 
     def RestartHost_callback(self):
-        self.hostport = int(self.host_port.text()) if self.host_port.text().isdigit() and int(
-            self.host_port.text()) > 0 and int(self.host_port.text()) < 65536 else 1234
-        self.TCPServer = TCPServer(port=self.hostport, func=self.Server_update_device_rec)
+        self.start_host_server()
+
+    def start_host_server(self):
+        """按界面端口创建并启动TCP服务器，同时注册局域网发现服务
+
+        局域网发现服务在TCP服务器事件循环中运行，随服务器一起关闭，
+        因此每次创建服务器（包括重启）都需要重新注册。
+        """
+        self.hostport = parse_port(self.host_port.text())
+        self.TCPServer = TCPServer(addr=self.hostip, port=self.hostport, func=self.Server_update_device_rec)
         self.TCPServer.ready_signal.connect(self.Server_ready_callback)
+        try:
+            self.TCPServer.add_socket_handler(LAN_Search.create_discovery_socket(),
+                                              LAN_Search.make_discovery_handler(self.hostport, "JW8103A_Control"))
+        except OSError as e:
+            self.updateInfo(f"局域网发现服务启动失败！{e}")
         self.TCPServer.start()
 
     def PortClose_callback(self):
@@ -312,12 +418,12 @@ class JW8103A_Control(QtWidgets.QMainWindow, Ui_MainWindow):
         self.port = int(self.IPport.text())
         try:
             self.data_source = "TCP"
-            self.TCPClient = TCPClient(self.address, self.port, func=lambda x: self.ClientQ.put(json.loads(x)))
+            self.TCPClient = TCPClient(self.address, self.port, func=self._rpc_response)
             self.TCPClient.start()
             self.TCPClient.connectedSignal.connect(self.connect_sig)
             self.updateInfo("TCP连接成功！")
-            edit_config("TCP", "address", self.address)
-            edit_config("TCP", "port", str(self.port))
+            self.set_config("TCP", "address", self.address)
+            self.set_config("TCP", "port", str(self.port))
             self.btn_group_enable(True)
         except:
             self.updateInfo("TCP连接失败！")
@@ -336,6 +442,7 @@ class JW8103A_Control(QtWidgets.QMainWindow, Ui_MainWindow):
 
     def CheckPort_callback(self):
         self.Com.clear()
+        refresh_port_cache()  # 重新扫描端口时同时刷新FTDI注册表缓存
         ports = serial.tools.list_ports.comports()
         for port in ports:
             self.Com_Dict["%s" % port[0]] = "%s" % port[1]
@@ -391,8 +498,10 @@ class JW8103A_Control(QtWidgets.QMainWindow, Ui_MainWindow):
                     QMessageBox.warning(self, "警告", "连接失败！", QMessageBox.Yes)
                 return False
         elif self.data_source == "TCP":
-            self.TCPClient.send(json.dumps({"cmd": "Connect"}))
-            result = self.ClientQ.get(block=True, timeout=1)
+            try:
+                result = self._send_rpc(self._CONNECT_CMD)
+            except FutureTimeoutError:
+                result = {"IsSuccessful": False}
             if result["IsSuccessful"]:
                 self.updateInfo("连接成功！")
                 self.Record_Thread = threading.Thread(target=self.PowerRecord)
@@ -408,6 +517,45 @@ class JW8103A_Control(QtWidgets.QMainWindow, Ui_MainWindow):
                     QMessageBox.warning(self, "警告", "连接失败！", QMessageBox.Yes)
                 return False
 
+    def _send_rpc(self, request, timeout=1):
+        """向TCP服务器发送带请求id的命令并等待对应的应答
+        
+        Args:
+            request: 预先编码的JSON请求模板，如_READ_POWER_CMD，%d处填入请求id
+            timeout: 等待应答的超时时间（秒）
+            
+        Returns:
+            dict: 服务器的应答数据
+            
+        Raises:
+            concurrent.futures.TimeoutError: 超时未收到应答
+        """
+        req_id = next(self._req_ids)
+        fut = Future()
+        with self._pending_lock:
+            self._pending[req_id] = fut
+        try:
+            self.TCPClient.send(request % req_id)
+            return fut.result(timeout=timeout)
+        finally:
+            with self._pending_lock:
+                self._pending.pop(req_id, None)
+
+    def _rpc_response(self, message):
+        """TCP客户端数据接收回调，按请求id将应答交给等待中的Future"""
+        resp = json.loads(message)
+        with self._pending_lock:
+            if "id" in resp:
+                # 带id的应答只交给对应的请求；请求已超时撤销时丢弃，避免迟到的应答错配给后续请求
+                fut = self._pending.pop(resp["id"], None)
+            elif self._pending:
+                # 服务器未回传请求id时按发送顺序配对
+                fut = self._pending.pop(next(iter(self._pending)))
+            else:
+                fut = None
+        if fut is not None:
+            fut.set_result(resp)
+
     def Server_update_device_rec(self, data):
         """TCP服务器数据接收处理函数
         
@@ -418,33 +566,34 @@ class JW8103A_Control(QtWidgets.QMainWindow, Ui_MainWindow):
         - Read_User_Power/GetPower: 读取功率值
         
         Args:
-            data: JSON格式的命令字符串
+            data: JSON格式的命令（UTF-8字节串）
             
         Returns:
             str: JSON格式的响应数据
         """
         data = json.loads(data)
-        if data["cmd"] == "Connect":
-            a = self.Connect_JW()
-            return self.make_pack(a, "", "")
-        elif data["cmd"] == "Disconnect":
-            self.Disconnect_JW(False)
-            return self.make_pack(True, "", "")
-        elif data["cmd"] == "Set_Wavelength":
-            CH = int(data["params"]["CH"])
-            Wavelength = int(data["params"]["Wavelength"])
-            a = self.JW.User_Wavelength(CH, Wavelength)
-            return self.make_pack(a, "", "")
-        elif data["cmd"] == "Read_User_Power":
-            return self.make_pack(True, self.Power_Buffer, "")
-        elif data["cmd"] == "ConnectDevice":
-            a = self.Connect_JW()
-            return self.make_pack(a, "", "")
-        elif data["cmd"] == "GetPower":
-            value = self.Power_Buffer
-            return self.make_pack(True, value, "")
-        else:
-            return self.make_pack(False, "", "Unknown command!")
+        handler = self._server_handlers.get(data["cmd"])
+        if handler is None:
+            return self.make_pack(False, "", "Unknown command!", data.get("id"))
+        # 客户端请求id原样回传，用于应答配对
+        return self.make_pack(*handler(data), data.get("id"))
+
+    def _server_connect(self, data):
+        return self.Connect_JW(), "", ""
+
+    def _server_disconnect(self, data):
+        self.Disconnect_JW(False)
+        return True, "", ""
+
+    def _server_set_wavelength(self, data):
+        CH = int(data["params"]["CH"])
+        Wavelength = int(data["params"]["Wavelength"])
+        return self.JW.User_Wavelength(CH, Wavelength), "", ""
+
+    def _server_read_power(self, data):
+        with self._power_lock:
+            snapshot = list(self._power_buffer) if self._power_valid else []
+        return True, snapshot, ""
 
     def Auto_server_rec(self, data):
         """自动化控制服务器数据接收处理函数
@@ -456,72 +605,64 @@ class JW8103A_Control(QtWidgets.QMainWindow, Ui_MainWindow):
         - check: 获取软件版本号
         
         Args:
-            data: JSON格式的命令字符串，格式为 {"opcode": "命令", "parameter": {...}}
+            data: JSON格式的命令（UTF-8字节串），格式为 {"opcode": "命令", "parameter": {...}}
             
         Returns:
             str: JSON格式的响应数据
         """
         data = json.loads(data)
-        if data['opcode'] == "GetPower":
-            res_dict = {"CH1": {
-                            "Power": self.Value_record[0]["value"],
-                            "Max": self.Value_record[0]["max"],
-                            "Min": self.Value_record[0]["min"]
-                        }, 
-                        "CH2": {
-                            "Power": self.Value_record[1]["value"],
-                            "Max": self.Value_record[1]["max"],
-                            "Min": self.Value_record[1]["min"]
-                        },
-                        "CH3": {
-                            "Power": self.Value_record[2]["value"],
-                            "Max": self.Value_record[2]["max"],
-                            "Min": self.Value_record[2]["min"]
-                        },
-                        "CH4": {
-                            "Power": self.Value_record[3]["value"],
-                            "Max": self.Value_record[3]["max"],
-                            "Min": self.Value_record[3]["min"]
-                        }
-                    }
-            return self.make_pack(True, res_dict, "Null")
-        elif data['opcode'] == 'RecordCon':
-            if data['parameter']['Con'] == 'Start':
-                success = self.start_record_callback()
-                error_msg = ""
-                if not success:
-                    error_msg = "开启记录错误!"
-                return self.make_pack(success, '', error_msg)
-            elif data['parameter']['Con'] == 'Stop':
-                success = self.stop_record_callback()
-                error_msg = ""
-                if not success:
-                    error_msg = "关闭记录错误!"
-                return self.make_pack(success, '', error_msg)
-            elif data['parameter']['Con'] == 'Clear':
-                self.Clean_callback()
-                return self.make_pack(True, '', 'Null')
-            else:
-                return self.make_pack(False, '', f'command not supported:{data}')
-        elif data['opcode'] == 'ConnectDevice':
-            # 自动化连接的时候串口还没有打开，所以还要先打开串口
-            a = self.PortOpen_callback(alert=False)
-            b = False
-            time.sleep(0.01)
-            if a:
-                b = self.Connect_JW(alert=False)
+        handler = self._auto_handlers.get(data['opcode'])
+        if handler is None:
+            return self.make_pack(False, "", "Unknown command!")
+        return self.make_pack(*handler(data))
+
+    def _auto_get_power(self, data):
+        # 应答模板在初始化时创建，此处只原地更新各通道的叶子值
+        for ch, rec in self._power_resp_items:
+            ch["Power"] = rec["value"]
+            ch["Max"] = finite_or_none(rec["max"])
+            ch["Min"] = finite_or_none(rec["min"])
+        return True, self._power_resp, "Null"
+
+    def _auto_record_con(self, data):
+        if data['parameter']['Con'] == 'Start':
+            success = self.start_record_callback()
+            error_msg = ""
+            if not success:
+                error_msg = "开启记录错误!"
+            return success, '', error_msg
+        elif data['parameter']['Con'] == 'Stop':
+            success = self.stop_record_callback()
             error_msg = ""
-            if not a or not b:
-                error_msg = "连接设备错误!"
-            return self.make_pack(a & b, "", error_msg)
-        elif data['opcode'] == 'check':
-            return self.make_pack(True, VERSION, 'Null')
+            if not success:
+                error_msg = "关闭记录错误!"
+            return success, '', error_msg
+        elif data['parameter']['Con'] == 'Clear':
+            self.Clean_callback()
+            return True, '', 'Null'
         else:
-            return self.make_pack(False, "", "Unknown command!")
+            return False, '', f'command not supported:{data}'
+
+    def _auto_connect_device(self, data):
+        # 自动化连接的时候串口还没有打开，所以还要先打开串口
+        a = self.PortOpen_callback(alert=False)
+        b = False
+        time.sleep(0.01)
+        if a:
+            b = self.Connect_JW(alert=False)
+        error_msg = ""
+        if not a or not b:
+            error_msg = "连接设备错误!"
+        return a & b, "", error_msg
+
+    def _auto_check(self, data):
+        return True, VERSION, 'Null'
 
-    def make_pack(self, IsSuccessful, Value, ErrorMessage):
+    def make_pack(self, IsSuccessful, Value, ErrorMessage, req_id=None):
         data = {"IsSuccessful": IsSuccessful, "Value": Value, "ErrorMessage": ErrorMessage}
-        return json.dumps(data)
+        if req_id is not None:
+            data["id"] = req_id
+        return _dumps(data, separators=(",", ":"))
 
     def Disconnect_JW(self, need_Box=True):
         self.JW = None
@@ -541,68 +682,74 @@ class JW8103A_Control(QtWidgets.QMainWindow, Ui_MainWindow):
         
         持续从设备读取功率数据，约100Hz采样率（9ms间隔）。
         每10次采样更新一次UI显示（约10Hz刷新率）。
-        如果正在记录，会同时发送数据保存信号。
+        如果正在记录，会直接在本线程将数据写入记录缓存。
         
         注意:
             此函数运行在独立线程中，通过Qt信号与主线程通信。
         """
-        if not os.path.exists("./Record"):
-            os.mkdir("./Record")
         counter = 0
-        self.last_time = 0
+        next_tick = time.monotonic()
         while True:
             try:
-                now = int(round(time.time() * 1000))
-                # if (now - aa) >= 1000:
-                #     aa = now
-                #     print(f"PowerRecord: {a}次/秒")
-                #     a = 0
-                if (now - self.last_time) >= 9:  # 9ms更新一次，100Hz
-                    counter += 1
-                    # a = a + 1
-                    if self.stopRecord:
-                        break
-                    result = []
-                    if self.data_source == "Port":  # 串口链接功率计的状态
-                        result = self.JW.Read_User_Power()
-                    elif self.data_source == "TCP":  # 使用TCP链接连接了功率计的主机的状态
-                        self.TCPClient.send(json.dumps({"cmd": "Read_User_Power"}))
-                        result = self.ClientQ.get(block=True, timeout=1)
-                        result = result["Value"]
-                    if result not in [[], None]:
-                        self.Power_Buffer = result
-                        if counter % 10 == 0:
-                            counter = 0
-                            self.value_update.emit(result)
+                # 睡眠到下一个采样时刻，9ms更新一次，100Hz
+                delay = next_tick - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                next_tick += 0.009
+                if next_tick < time.monotonic() - 0.05:  # 落后过多时重新对齐，避免连续追赶
+                    next_tick = time.monotonic() + 0.009
+                counter += 1
+                if self.stopRecord:
+                    break
+                result = []
+                if self.data_source == "Port":  # 串口链接功率计的状态
+                    result = self.JW.Read_User_Power()
+                elif self.data_source == "TCP":  # 使用TCP链接连接了功率计的主机的状态
+                    result = self._send_rpc(self._READ_POWER_CMD)["Value"]
+                if result not in [[], None]:
+                    with self._power_lock:
+                        self._power_buffer[:] = result
+                        self._power_valid = True
+                    if counter % 10 == 0:
+                        counter = 0
+                        self.value_update.emit(result)
                     if self.start_record:
-                        self.value_save.emit(result)  # 更改为在按下停止记录后才开始保存
-                    self.last_time = now
+                        self._append_row(result)  # 直接在采集线程写入，不经过Qt事件循环
             except Exception as e:
                 print(f"PowerRecord Error: {e}")
 
     def update_value(self, value: list):
-        for i in range(4):
-            self.CH_Value_dict[i].display(str(value[i]))
-            self.Value_record[i]["value"] = value[i]
-            if value[i] > self.Value_record[i]["max"]:
-                self.Value_record[i]["max"] = value[i]
-            if self.Value_record[i]["min"] is None:
-                self.Value_record[i]["min"] = value[i]
-            elif self.Value_record[i]["min"] is not None and value[i] < self.Value_record[i]["min"]:
-                self.Value_record[i]["min"] = value[i]
-
-            self.CH_max_dict[i].display(str(self.Value_record[i]["max"]))
-            self.CH_min_dict[i].display(str(self.Value_record[i]["min"]))
+        for i, v in enumerate(value):
+            rec = self._records[i]
+            rec["value"] = v
+            rec["max"] = v if v > rec["max"] else rec["max"]
+            rec["min"] = v if v < rec["min"] else rec["min"]
+
+            self._value_widgets[i].display(v)
+            self._max_widgets[i].display(rec["max"] if math.isfinite(rec["max"]) else 0)
+            self._min_widgets[i].display(rec["min"] if math.isfinite(rec["min"]) else 0)
             if not self.stopped:
-                self.CH_Plot_dict[i].update_signal.emit({'功率': self.CH_Value_dict[i].value()})
+                self._plots[i].update_signal.emit({_PLOT_KEY: v})
 
     def start_record_callback(self):
         if self.start_record:
             print("已经开始记录，请勿重复开始！")
             return False
+        self.startTime = time.strftime('%Y-%m-%d %H-%M-%S')
+        # 表头在开始记录时确定，记录过程中修改通道名称不影响本次文件
+        self._rec_header = "时间," + ",".join(self.CH_name_dict[i].text() for i in range(4)) + "\n"
+        try:
+            fh = open(f"./Record/PowerRecord_{self.startTime}.csv", "w", encoding="gbk", buffering=1 << 16)
+            fh.write(self._rec_header)
+        except OSError as e:
+            self.updateInfo(f"创建记录文件失败！{e}")
+            return False
+        with self._rec_lock:
+            self._rec_fh = fh
+            self._rec_buf = []
+            self._rec_flush_time = time.monotonic()
         self.start_record = True
         self.stopped = False
-        self.startTime = time.strftime('%Y-%m-%d %H-%M-%S')
         self.startRecordBtn.setEnabled(False)
         self.stopRecordBtn.setEnabled(True)
         self.updateInfo("开始记录！")
@@ -620,6 +767,13 @@ class JW8103A_Control(QtWidgets.QMainWindow, Ui_MainWindow):
         self.updateInfo("停止记录！")
         # 停止图像更新
 
+        # 写入剩余数据并关闭文件
+        with self._rec_lock:
+            self._rec_fh.writelines(self._rec_buf)
+            self._rec_buf.clear()
+            self._rec_fh.close()
+            self._rec_fh = None
+
         # 更改文件名
         try:
             os.rename(f"./Record/PowerRecord_{self.startTime}.csv",
@@ -635,12 +789,30 @@ class JW8103A_Control(QtWidgets.QMainWindow, Ui_MainWindow):
             return False
         return True
 
-    def save_value(self, value: list):
-        if not os.path.exists(f"./Record/PowerRecord_{self.startTime}.csv"):
-            with open(f"./Record/PowerRecord_{self.startTime}.csv", "w", encoding="gbk") as f:
-                f.write(f"时间,{self.CH1_name.text()},{self.CH2_name.text()},{self.CH3_name.text()},{self.CH4_name.text()}\n")
-        with open(f"./Record/PowerRecord_{self.startTime}.csv", "a") as f:
-            f.write(datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3] + "," + str(value[0]) + "," + str(value[1]) + "," + str(value[2]) + "," + str(value[3]) + "\n")
+    def _timestamp_ms(self):
+        """生成毫秒精度的时间戳字符串，秒级部分每秒只格式化一次"""
+        now = time.time()
+        sec = int(now)
+        if sec != self._ts_sec:
+            self._ts_sec = sec
+            self._ts_sec_str = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(sec))
+        return f"{self._ts_sec_str}.{int((now - sec) * 1000):03d}"
+
+    def _append_row(self, value: list):
+        """缓存一行记录数据，每满100行或距上次写入超过1秒时批量写入记录文件
+        
+        由采集线程直接调用，通过_rec_lock与开始/停止记录互斥。
+        """
+        with self._rec_lock:
+            if self._rec_fh is None:  # 已停止记录
+                return
+            self._rec_buf.append(f"{self._timestamp_ms()},{value[0]},{value[1]},{value[2]},{value[3]}\n")
+            now = time.monotonic()
+            if len(self._rec_buf) >= 100 or now - self._rec_flush_time >= 1:
+                self._rec_fh.writelines(self._rec_buf)
+                self._rec_fh.flush()  # 写入磁盘，异常退出时最多丢失约1秒数据
+                self._rec_buf.clear()
+                self._rec_flush_time = now
 
     def Set_Wavelength(self, CH: int):
         a = self.JW.User_Wavelength(CH, self.CH_Twave_dict[CH - 1].currentIndex() + 1)
@@ -657,20 +829,24 @@ class JW8103A_Control(QtWidgets.QMainWindow, Ui_MainWindow):
             self.CH_Value_dict[i].display("0")
             self.CH_max_dict[i].display("0")
             self.CH_min_dict[i].display("0")
-            self.Value_record[i]["value"] = 0
-            self.Value_record[i]["max"] = -60
-            self.Value_record[i]["min"] = 0
+            self._records[i]["value"] = 0
+            self._records[i]["max"] = float("-inf")
+            self._records[i]["min"] = float("inf")
             self.CH_Plot_dict[i].clearData()
 
     def updateInfo(self, info):
         if self.data_source == "Port":
-            self.portInfo.append(datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S") + " " + info)
-            self.portInfo.append("\n")
-            self.portInfo.moveCursor(QtGui.QTextCursor.End)
+            text_edit = self.portInfo
         elif self.data_source == "TCP":
-            self.TCPInfo.append(datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S") + " " + info)
-            self.TCPInfo.append("\n")
-            self.TCPInfo.moveCursor(QtGui.QTextCursor.End)
+            text_edit = self.TCPInfo
+        else:
+            return
+        # 只有用户停留在底部时才跟随滚动，避免打断向上翻看
+        sb = text_edit.verticalScrollBar()
+        at_bottom = sb.value() == sb.maximum()
+        text_edit.append(f"{time.strftime('%Y-%m-%d %H:%M:%S')} {info}\n")
+        if at_bottom:
+            text_edit.moveCursor(QtGui.QTextCursor.End)
 
     def closeEvent(self, event):
         reply = QtWidgets.QMessageBox.question(self,
@@ -680,10 +856,14 @@ class JW8103A_Control(QtWidgets.QMainWindow, Ui_MainWindow):
                                                QtWidgets.QMessageBox.No)
         if reply == QtWidgets.QMessageBox.Yes:
             event.accept()
+            # 正在记录时先停止记录，写入缓存的数据并关闭文件，os._exit不会刷新文件缓冲
+            if self.start_record:
+                self.stop_record_callback()
             if self.data_source == "Port":
                 self.PortClose_callback()
             elif self.data_source == "TCP":
                 self.TCPDisconnect_callback()
+            self.flush_config()
             os._exit(0)
 
         else:
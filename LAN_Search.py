@@ -16,14 +16,19 @@
     LAN_Search: 局域网服务发现工具类
 
 使用示例:
-    # 服务端
+    # 服务端（独立线程阻塞运行）
     >>> LAN_Search.start_discovery_server(1234, "JW8103A_Control")
     
+    # 服务端（注册到TCPServer事件循环，随服务器关闭）
+    >>> server.add_socket_handler(LAN_Search.create_discovery_socket(),
+    ...                           LAN_Search.make_discovery_handler(1234, "JW8103A_Control"))
+    
     # 客户端
     >>> servers = LAN_Search.discover_services(timeout=5)
     >>> print(servers)  # [("JW8103A_Control", "192.168.1.100", 1234)]
 """
 
+import select
 import socket
 import threading
 import time
@@ -33,42 +38,67 @@ class LAN_Search:
     """
     局域网服务发现工具类
     
-    提供UDP广播的服务发现功能，包含服务端监听和客户端发现两个静态方法。
+    提供UDP广播的服务发现功能，包含服务端监听和客户端发现的静态方法。
     """
     
     def __init__(self):
         pass
     
     @staticmethod
-    def start_discovery_server(port, service_name="MyService"):
+    def create_discovery_socket():
         """
-        启动发现服务，响应客户端的发现请求
-        :param port: 服务实际监听的TCP端口
-        :param service_name: 服务名称标识
+        创建绑定到发现端口的UDP socket
+        :return: 已绑定的UDP socket
         """
-        # 创建UDP socket
         sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
         sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
         sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
         
         # 绑定到所有接口的指定端口
         sock.bind(('0.0.0.0', 44444))  # 使用固定端口用于发现
-        
-        print(f"Discovery server started, listening for clients...")
-        
-        while True:
+        return sock
+
+    @staticmethod
+    def make_discovery_handler(port, service_name="MyService"):
+        """
+        生成发现请求处理函数，可注册到TCPServer的事件循环中
+        :param port: 服务实际监听的TCP端口
+        :param service_name: 服务名称标识
+        :return: 处理函数，参数为发现socket，每次调用处理一个请求
+        """
+        # 响应包含服务名称和实际端口
+        response = f"{service_name}:{port}".encode()
+
+        def handle(sock):
             try:
                 data, addr = sock.recvfrom(1024)
-                if data.decode() == "DISCOVER":
-                    # 发送响应，包含服务名称和实际端口
-                    response = f"{service_name}:{port}"
-                    sock.sendto(response.encode(), addr)
+                if data == b"DISCOVER":
+                    sock.sendto(response, addr)
                     print(f"Responded to discovery request from {addr}")
-            except KeyboardInterrupt:
-                break
             except Exception as e:
                 print(f"Discovery error: {e}")
-                continue
+
+        return handle
+
+    @staticmethod
+    def start_discovery_server(port, service_name="MyService"):
+        """
+        启动发现服务，阻塞地响应客户端的发现请求
+        :param port: 服务实际监听的TCP端口
+        :param service_name: 服务名称标识
+        """
+        sock = LAN_Search.create_discovery_socket()
+        handle = LAN_Search.make_discovery_handler(port, service_name)
+        
+        print(f"Discovery server started, listening for clients...")
+        
+        try:
+            while True:
+                handle(sock)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            sock.close()
 
     @staticmethod
     def discover_services(timeout=5):
@@ -77,10 +107,10 @@ class LAN_Search:
         :param timeout: 超时时间(秒)
         :return: 发现的服务器列表 [(service_name, ip, port), ...]
         """
-        # 创建UDP socket
+        # 创建UDP socket，使用非阻塞模式配合select按剩余时间等待
         sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
         sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
-        sock.settimeout(timeout)
+        sock.setblocking(False)
         
         # 发送发现请求
         message = "DISCOVER"
@@ -88,21 +118,35 @@ class LAN_Search:
         print("Sent discovery request")
         
         servers = []
-        start_time = time.time()
+        start_time = time.monotonic()
         
-        # 等待响应
-        while time.time() - start_time < timeout:
-            try:
-                data, addr = sock.recvfrom(1024)
-                response = data.decode()
-                if ':' in response:
-                    service_name, port = response.split(':')
-                    servers.append((service_name, addr[0], int(port)))
-                    print(f"Discovered service: {service_name} at {addr[0]}:{port}")
-            except socket.timeout:
-                continue
-            except Exception as e:
-                print(f"Discovery error: {e}")
-                continue
+        # 等待响应，总等待时间不超过timeout
+        try:
+            while True:
+                remaining = timeout - (time.monotonic() - start_time)
+                if remaining <= 0:
+                    break
+                readable, _, _ = select.select([sock], [], [], remaining)
+                if not readable:
+                    break
+                # 一次唤醒后读完所有已到达的响应
+                while True:
+                    try:
+                        data, addr = sock.recvfrom(1024)
+                    except BlockingIOError:
+                        break
+                    except Exception as e:
+                        print(f"Discovery error: {e}")
+                        break
+                    response = data.decode(errors="ignore")
+                    if ':' in response:
+                        try:
+                            service_name, port = response.split(':')
+                            servers.append((service_name, addr[0], int(port)))
+                            print(f"Discovered service: {service_name} at {addr[0]}:{port}")
+                        except ValueError:
+                            print(f"Discovery error: invalid response {response!r}")
+        finally:
+            sock.close()
         
-        return servers
\ No newline at end of file
+        return servers
@@ -1,17 +1,57 @@
 import serial.tools.list_ports as list_ports
 import winreg
 
+ARBITER_KEY_PATH = r"SYSTEM\CurrentControlSet\Control\COM Name Arbiter\Devices"
+
+# 注册表和串口枚举结果在会话中很少变化，缓存后避免每次调用都遍历
+_device_map_cache = None  # {端口名: 设备实例路径}
+_comports_cache = None    # {端口名: 硬件ID}
+
+
+def refresh_port_cache():
+    """
+    清空端口缓存，下次查询时重新读取注册表和枚举串口
+    :return: None
+    """
+    global _device_map_cache, _comports_cache
+    _device_map_cache = None
+    _comports_cache = None
+
+
+def _device_map():
+    """
+    读取COM Name Arbiter下所有端口对应的设备实例路径
+    :return: {端口名: 设备实例路径}
+    """
+    global _device_map_cache
+    if _device_map_cache is None:
+        devices = {}
+        key = winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, ARBITER_KEY_PATH, 0, winreg.KEY_READ)
+        try:
+            i = 0
+            while True:
+                try:
+                    name, value, _ = winreg.EnumValue(key, i)
+                except OSError:
+                    break
+                devices[name] = value
+                i += 1
+        finally:
+            winreg.CloseKey(key)
+        _device_map_cache = devices
+    return _device_map_cache
+
+
 def get_port_ID(port_name):
     """
     获取端口的硬件ID
     :param port_name: 端口名
     :return: 硬件ID
     """
-    ports = list_ports.comports()
-    for p in ports:
-        if p.device == port_name:
-            return p.hwid
-    return None
+    global _comports_cache
+    if _comports_cache is None or port_name not in _comports_cache:
+        _comports_cache = {p.device: p.hwid for p in list_ports.comports()}
+    return _comports_cache.get(port_name)
 
     # ports = list_ports.comports()
     # for p in ports:
@@ -24,9 +64,7 @@ def SetLatencyTimer(port_name, latency_timer):
     :param latency_timer: 延迟时间
     :return: None
     """
-    key_path = r"SYSTEM\CurrentControlSet\Control\COM Name Arbiter\Devices"
-    key = winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, key_path, 0, winreg.KEY_READ)
-    ID = winreg.QueryValueEx(key, port_name)[0].split("#")[1]
+    ID = _device_map()[port_name].split("#")[1]
     key_path = f"SYSTEM\\CurrentControlSet\\Enum\\FTDIBUS\\{ID}\\0000\\Device Parameters"
     try:
         key = winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, key_path, 0, winreg.KEY_WRITE)
@@ -35,6 +73,7 @@ def SetLatencyTimer(port_name, latency_timer):
         winreg.CloseKey(key)
         print(f"设置{port_name}的延迟时间为{latency_timer}ms")
     except WindowsError as e:
+        refresh_port_cache()
         print(f"设置{port_name}的延迟时间失败: {e}")
 
 def check_is_FTDI_port(port_name):
@@ -43,16 +82,15 @@ def check_is_FTDI_port(port_name):
     :param port_name: 端口名
     :return: bool
     """
-    key_path = r"SYSTEM\CurrentControlSet\Control\COM Name Arbiter\Devices"
     try:
-        key = winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, key_path, 0, winreg.KEY_READ)
-        if "ftdibus" in winreg.QueryValueEx(key, port_name)[0]:
-            winreg.CloseKey(key)
-            return True
-        else:
-            winreg.CloseKey(key)
-            return False
+        devices = _device_map()
+        if port_name not in devices:
+            # 可能是新插入的设备，重新读取一次注册表
+            refresh_port_cache()
+            devices = _device_map()
+        return "ftdibus" in devices.get(port_name, "")
     except WindowsError:
+        refresh_port_cache()
         return False
         
 
@@ -22,14 +22,23 @@
     >>> plot.update_signal.emit({'功率': -15.5})  # 添加新数据点
 """
 
+import math
 import numpy as np
 import pyqtgraph as pg
-from PyQt5.QtCore import QThread, pyqtSignal, Qt
+from PyQt5.QtCore import QThread, QTimer, pyqtSignal, Qt
 
 # pyqtgraph全局配置：白底黑线
 pg.setConfigOption('background', 'w')
 pg.setConfigOption('foreground', 'k')
 
+# 安装了PyOpenGL时使用OpenGL绘制曲线，否则保持默认的Qt光栅绘制
+try:
+    import OpenGL  # noqa: F401
+    pg.setConfigOption('useOpenGL', True)
+    pg.setConfigOption('enableExperimental', True)
+except ImportError:
+    pass
+
 
 class MyPlot(pg.GraphicsLayoutWidget):
     """
@@ -41,15 +50,22 @@ class MyPlot(pg.GraphicsLayoutWidget):
         update_signal: 数据更新信号，参数为{序列名: 新数据值}
         
     属性:
-        dataDict: 数据字典，{序列名: numpy数组}
+        dataDict: 数据字典，{序列名: 预分配的numpy缓冲区}
+        dataLenDict: 各序列缓冲区中的有效数据长度
+        rangeDict: 各序列有效数据的纵轴范围[最小值, 最大值]，追加数据时增量更新
         posDict: 位置偏移字典
         NowPlotNo: 当前显示的数据序列索引
     """
     
     dataDict = {}      # 数据存储字典
+    dataLenDict = {}   # 有效数据长度字典
+    rangeDict = {}     # 纵轴范围字典
     posDict = {}       # 位置偏移字典
     NowPlotNo = 0      # 当前显示序列索引
     update_signal = pyqtSignal(dict)  # 数据更新信号
+    INIT_CAPACITY = 1024  # 缓冲区初始容量
+    REDRAW_INTERVAL = 33  # 重绘周期(ms)，约30Hz
+    LIVE_CHUNK = 256      # 活动尾段累计到该点数后并入历史曲线
 
     def __init__(self, dataDict, dataLen=30):
         """
@@ -60,60 +76,162 @@ class MyPlot(pg.GraphicsLayoutWidget):
             dataLen: 保留参数（未使用）
         """
         super(MyPlot, self).__init__()
-        self.dataDict = dataDict
+        self.dataDict = {}
+        self.dataLenDict = {}
+        self.rangeDict = {}
+        self.posDict = {}
 
         # self.dataLen = dataLen
+        # 每个序列使用预分配缓冲区，写满时容量翻倍，避免np.append每次复制整个数组
         for k, v in dataDict.items():
             self.posDict[k] = 0
-            if type(v) == list:
-                self.dataDict[k] = np.array(v)
-            elif type(v) == np.ndarray:
-                self.dataDict[k] = v
+            v = np.asarray(v, dtype=np.float64).ravel()
+            self.dataDict[k] = np.empty(max(self.INIT_CAPACITY, len(v)), dtype=np.float64)
+            self.dataDict[k][:len(v)] = v
+            self.dataLenDict[k] = len(v)
+            self.rangeDict[k] = [math.inf, -math.inf]
+            self._update_range(k, v)
+
+        # 序列名在构造后不再变化，缓存键元组和当前显示的键，避免每帧构造列表
+        self._keys = tuple(self.dataDict.keys())
+        self._current_key = self._keys[self.NowPlotNo]
 
         self.plot1 = self.addPlot()
-        key = list(self.dataDict.keys())[self.NowPlotNo]
+        key = self._current_key
         self.plot1.setTitle(key, **{"font-family": "微软雅黑", 'font-size': '12pt'})
         self.update_signal.connect(self.updateData)
-        self.curve = self.plot1.plot(self.dataDict[key], pen=pg.mkPen({'color': (0, 0, 255), 'width': 4}))
+        # 曲线分为两段：frozen_curve显示已固定的历史数据，每LIVE_CHUNK个点才更新一次；
+        # curve只显示最近的活动尾段，每次重绘只重建这一小段路径。
+        # 活动段点数很少，直接使用PlotCurveItem并加入ViewBox，不经过PlotDataItem的降采样/裁剪处理
+        pen = pg.mkPen({'color': (0, 0, 255), 'width': 4})
+        self._frozen_len = 0
+        self.frozen_curve = self.plot1.plot(pen=pen)
+        self.curve = pg.PlotCurveItem(pen=pen)
+        self.plot1.vb.addItem(self.curve)
+        # 只绘制可见范围内的数据，并按像素峰值降采样，绘制开销与屏幕宽度相关而与点数无关
+        self.plot1.setDownsampling(ds=True, auto=True, mode='peak')
+        self.plot1.setClipToView(True)
+        # 显示范围由增量维护的数据范围直接设置，不让ViewBox每帧扫描全部数据；
+        # 用户手动缩放/平移后停止跟随，切换序列或清除数据时恢复
+        self.plot1.disableAutoRange()
+        self._follow = True
+        self.plot1.vb.sigRangeChangedManually.connect(self._stop_follow)
+
+        # 数据追加只标记dirty，由定时器统一重绘，重绘频率与采样频率无关
+        self._dirty = True  # 首次定时器触发时绘制初始数据
+        self._timer = QTimer(self)
+        self._timer.timeout.connect(self._flush)
+        self._timer.start(self.REDRAW_INTERVAL)
 
         pass
 
+    def getData(self, key):
+        """返回序列的有效数据（缓冲区视图，不复制）"""
+        return self.dataDict[key][:self.dataLenDict[key]]
+
+    def _append(self, key, value):
+        """向序列追加数据，value可以是单个数值或序列，容量不足时翻倍扩容"""
+        scalar = not np.ndim(value)
+        if scalar:
+            n = 1
+        else:
+            value = np.asarray(value, dtype=np.float64).ravel()
+            n = len(value)
+        buf = self.dataDict[key]
+        length = self.dataLenDict[key]
+        if length + n > len(buf):
+            capacity = len(buf) * 2
+            while capacity < length + n:
+                capacity *= 2
+            new_buf = np.empty(capacity, dtype=np.float64)
+            new_buf[:length] = buf[:length]
+            self.dataDict[key] = buf = new_buf
+        if scalar:
+            buf[length] = value
+        else:
+            buf[length:length + n] = value
+        self.dataLenDict[key] = length + n
+        self._update_range(key, value)
+
+    def _update_range(self, key, value):
+        """用新追加的数据增量更新序列的纵轴范围，忽略非有限值"""
+        r = self.rangeDict[key]
+        if np.ndim(value):
+            value = np.asarray(value, dtype=np.float64)
+            value = value[np.isfinite(value)]
+            if not len(value):
+                return
+            low, high = value.min(), value.max()
+        else:
+            if not math.isfinite(value):
+                return
+            low = high = value
+        if low < r[0]:
+            r[0] = low
+        if high > r[1]:
+            r[1] = high
+
+    def _stop_follow(self, *args):
+        """用户手动调整显示范围后不再自动跟随"""
+        self._follow = False
+
     def mousePressEvent(self, ev):
         return
 
     def mouseDoubleClickEvent(self, ev):
-        self.NowPlotNo = (self.NowPlotNo + 1) % len(self.dataDict)
-        key = list(self.dataDict.keys())[self.NowPlotNo]
+        self.NowPlotNo = (self.NowPlotNo + 1) % len(self._keys)
+        self._current_key = key = self._keys[self.NowPlotNo]
         self.plot1.setTitle(key, **{"font-family": "微软雅黑", 'font-size': '20pt'})
 
-        data1 = self.dataDict[key]
-        self.curve.setData(data1)
         self.posDict[key] = 0
-        self.curve.setPos(self.posDict[key], 0)
+        self._freeze(key)
+        self._follow = True
+        self._dirty = True
 
     def updateData(self, dataAddDict):
         for k, v in dataAddDict.items():
-            # if len(self.dataDict[k]) < self.dataLen:
-            self.dataDict[k] = np.append(self.dataDict[k], v)
-            # else:
-            #     self.dataDict[k][:-1] = self.dataDict[k][1:]
-            #     self.dataDict[k][-1] = v
-            #     self.posDict[k] += 1
-
-        key = list(self.dataDict.keys())[self.NowPlotNo]
-        data1 = self.dataDict[key]
-        self.curve.setData(data1)
+            self._append(k, v)
+        self._dirty = True
+
+    def _flush(self):
+        """定时器回调：有新数据时才重绘当前序列"""
+        if not self._dirty:
+            return
+        self._dirty = False
+        key = self._current_key
+        length = self.dataLenDict[key]
+        if length < self._frozen_len or length - self._frozen_len >= self.LIVE_CHUNK:
+            self._freeze(key)
+        # 活动段从历史段最后一个点开始，保证两段曲线首尾相连；
+        # 横坐标直接给出而不用setPos平移，clipToView按数据横坐标裁剪
+        start = max(self._frozen_len - 1, 0)
+        self.curve.setData(np.arange(start, length), self.dataDict[key][start:length])
         self.curve.setPos(self.posDict[key], 0)
-        self.plot1.autoRange()
+        if self._follow:
+            self._apply_range(key, length)
+
+    def _apply_range(self, key, length):
+        """按增量维护的数据范围设置显示范围，O(1)，不扫描数据"""
+        pos = self.posDict[key]
+        y_min, y_max = self.rangeDict[key]
+        if y_min > y_max:  # 尚无有效数据
+            return
+        self.plot1.setRange(xRange=(pos, pos + max(length - 1, 1)), yRange=(y_min, y_max), padding=0.05)
+
+    def _freeze(self, key):
+        """将当前序列的全部已有数据并入历史曲线"""
+        self._frozen_len = self.dataLenDict[key]
+        self.frozen_curve.setData(self.getData(key))
+        self.frozen_curve.setPos(self.posDict[key], 0)
 
     def clearData(self):
-        for k, v in self.dataDict.items():
-            self.dataDict[k] = np.array([])
+        # 只重置有效长度，保留已分配的缓冲区
+        for k in self.dataDict:
+            self.dataLenDict[k] = 0
+            self.rangeDict[k] = [math.inf, -math.inf]
             self.posDict[k] = 0
-        key = list(self.dataDict.keys())[self.NowPlotNo]
-        self.curve.setData(self.dataDict[key])
-        self.curve.setPos(self.posDict[key], 0)
-        self.plot1.autoRange()
+        self._follow = True
+        self._dirty = True
 
 
 if __name__ == '__main__':
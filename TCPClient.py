@@ -44,20 +44,25 @@ class TCPClient(QThread):
     
     信号:
         connectedSignal: 连接状态变化信号，参数为("YES"/"NO", 信息描述)
-        infoSignal: 信息通知信号，参数为(客户端名称, 消息内容)
+        infoSignal: 信息通知信号，参数为(客户端名称, 消息内容)，接收日志按INFO_INTERVAL合并发出
         
     属性:
         host: 服务器IP地址
         port: 服务器端口
         running: 运行状态标志
         isconnected: 连接状态标志
-        func: 数据处理回调函数
+        func: 数据处理回调函数，参数为一条消息(UTF-8字节串)
     """
     
     # Qt信号定义
     connectedSignal = pyqtSignal([str, str])  # 连接状态信号
     infoSignal = pyqtSignal([str, str])        # 信息通知信号
 
+    RECV_SIZE = 65536  # 单次接收的最大字节数
+    SOCK_BUF_SIZE = 1 << 20  # socket收发缓冲区大小
+    INFO_INTERVAL = 0.1      # 接收日志infoSignal的最小发送间隔(s)
+    SEND_WAIT = 0.5          # send等待连接建立的最长时间(s)
+
     def __init__(self, host, port, name=None, func=lambda x: x):
         """
         初始化TCP客户端
@@ -66,7 +71,7 @@ class TCPClient(QThread):
             host: 服务器IP地址
             port: 服务器端口号
             name: 客户端名称标识（可选）
-            func: 接收数据后的处理回调函数
+            func: 接收数据后的处理回调函数，参数为UTF-8编码的bytearray，可直接交给json.loads
         """
         super().__init__()
         self.host = host
@@ -74,8 +79,15 @@ class TCPClient(QThread):
         self.running = False
         self.isconnected = False
         self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        # 关闭Nagle算法，小命令立即发出；放大收发缓冲区减少系统调用
+        self.socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, self.SOCK_BUF_SIZE)
+        self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, self.SOCK_BUF_SIZE)
         self.socket.settimeout(2)  # 设置连接超时时间为2秒
         self.func = func  # 数据处理回调函数
+        self._connected_evt = threading.Event()  # 连接建立后置位，send据此等待连接
+        self._rbuf = bytearray(self.RECV_SIZE)    # 预分配的接收缓冲区，recv_into复用
+        self._rmv = memoryview(self._rbuf)
         self.name = name 
 
 
@@ -86,6 +98,7 @@ class TCPClient(QThread):
 
     def run(self):
         """线程运行函数"""
+        info_batch = []  # 尚未发出的接收日志
         try:
             self.socket.connect((self.host, self.port))
             # logging.info("Connected to server")
@@ -93,43 +106,67 @@ class TCPClient(QThread):
             self.connectedSignal.emit("YES", "链接成功！") # 发送信号，连接成功
             self.socket.settimeout(None) # 取消超时时间，保持链接状态
             self.isconnected = True
-            buffer = ""
+            self._connected_evt.set()
+            # 按字节累积并查找换行符分帧，完整消息以字节串交给func，避免UTF-8多字节字符被截断；
+            # 只有日志需要字符串，在合并发出infoSignal时统一解码
+            buffer = bytearray()
+            # 接收日志最多每INFO_INTERVAL秒合并发出一次infoSignal，避免高频应答时大量跨线程信号
+            # 堆积在GUI事件队列中：距上次发出已超过间隔时立即发出，否则先累积到下次接收或循环结束。
+            # 不为此修改socket超时，send()在其他线程中共用同一socket
+            info_time = 0.0
             while self.running:
-                data = self.socket.recv(1024).decode('utf-8')  # Buffer size is 1024 bytes
-                # print(f"收到来自{self.socket.getpeername()}的数据:{data}\n")
-                # print("received:"+data)
-                if not data:
+                n = self.socket.recv_into(self._rbuf)
+                if not n:
                     # logging.info("Connection closed by server")
                     print("Connection closed by server")
                     self.connectedSignal.emit("NO", "连接断开！")
                     break
-                buffer += data
-                if "\n" in buffer:
-                    messages = buffer.split("\n")
-                    for message in messages[:-1]:
-                        if message:
-                            self.func(message)
-                            self.infoSignal.emit(self.name, "received:"+message)
-                    buffer = messages[-1]
-        except ConnectionRefusedError or TimeoutError:
+                buffer += self._rmv[:n]
+                start = 0
+                end = buffer.find(b"\n")
+                while end != -1:
+                    if end > start:
+                        message = buffer[start:end]
+                        self.func(message)
+                        info_batch.append(message)
+                    start = end + 1
+                    end = buffer.find(b"\n", start)
+                del buffer[:start]
+                now = time.monotonic()
+                if info_batch and now - info_time >= self.INFO_INTERVAL:
+                    self._emit_received(info_batch)
+                    info_batch.clear()
+                    info_time = now
+        except (ConnectionRefusedError, TimeoutError, socket.timeout) as e:
             # logging.error("Connection refused")
-            print("Connection filed\n")
-            self.connectedSignal.emit("NO", "连接失败！")
+            print(f"Connection failed: {e}\n")
+            self.connectedSignal.emit("NO", f"连接失败！{e}")
             self.isconnected = False
         except Exception as e:
             # logging.error(f"Error: {str(e)}")
             print(f"Error: {str(e)}\n")
             self.connectedSignal.emit("NO", "连接失败！")
             self.isconnected = False
+        finally:
+            self._connected_evt.clear()
+            if info_batch:  # 循环结束（包括异常断开）时发出剩余日志
+                self._emit_received(info_batch)
+
+    def _emit_received(self, messages):
+        """将累积的接收消息解码后合并为一条日志发出"""
+        text = b"\nreceived:".join(messages).decode('utf-8', 'replace')
+        self.infoSignal.emit(self.name, f"received:{text}")
 
     def send(self, data):
         """发送数据\n
         :param data: 要发送的数据"""
+        # 等待连接建立，超时未连接则直接报告，不再轮询等待
+        if not self._connected_evt.wait(self.SEND_WAIT):
+            self.connectedSignal.emit("NO", "未连接！")
+            return
         try:
-            while not self.running:
-                time.sleep(0.1)
             data = data + "\n"
-            self.infoSignal.emit(self.name, "send:"+data)
+            self.infoSignal.emit(self.name, f"send:{data}")
             self.socket.sendall(data.encode('utf-8'))
             # print("send:"+data)
         except Exception as e:
@@ -146,6 +183,7 @@ class TCPClient(QThread):
                 # self.socket.close()
             self.running = False
             self.isconnected = False
+            self._connected_evt.clear()
             self.connectedSignal.emit("NO", "关闭连接！")
             # super().terminate()
         else:
@@ -154,7 +192,7 @@ class TCPClient(QThread):
 if __name__ == '__main__':
     import json
     def fun(data):
-        print("func:",data)
+        print("func:",data.decode('utf-8'))
 
     app = QApplication(sys.argv)
     client = TCPClient("127.0.0.1", 10003, func=fun)
@@ -7,7 +7,7 @@ TCP服务器模块
 用于向远程客户端提供功率计数据访问和控制接口。
 
 主要功能:
-    - 多客户端并发连接支持
+    - 多客户端连接支持（单线程selectors事件循环）
     - 基于换行符的消息分帧
     - 自定义请求处理回调
     - 优雅的服务器关闭机制
@@ -17,6 +17,7 @@ TCP服务器模块
     
 使用示例:
     >>> def handle_request(data):
+    ...     request = json.loads(data)  # data为UTF-8字节串
     ...     return '{"result": "ok"}'
     >>> server = TCPServer(port=1234, func=handle_request)
     >>> server.ready_signal.connect(on_ready)
@@ -25,9 +26,9 @@ TCP服务器模块
 
 import sys
 import socket
+import selectors
 from PyQt5.QtWidgets import QApplication, QMainWindow, QLabel, QVBoxLayout, QWidget, QPushButton, QLineEdit, QTextEdit
 from PyQt5.QtCore import QThread, pyqtSignal, Qt
-import threading
 from queue import Queue
 import json
 
@@ -36,8 +37,8 @@ class TCPServer(QThread):
     """
     TCP服务器线程类
     
-    基于PyQt5 QThread实现的多客户端TCP服务器，每个客户端连接
-    创建独立线程处理，支持并发请求。
+    基于PyQt5 QThread实现的多客户端TCP服务器，所有客户端连接
+    在服务器线程内通过selectors事件循环统一处理，不再为每个连接创建线程。
     
     信号:
         cmd_send_signal: 命令发送信号
@@ -46,25 +47,31 @@ class TCPServer(QThread):
     属性:
         host: 服务器绑定的IP地址
         port: 服务器监听端口
-        func: 请求处理回调函数，接收请求数据返回响应数据
+        func: 请求处理回调函数，接收请求数据(UTF-8字节串)返回响应字符串
         client_sockets: 已连接的客户端socket列表
+        socket_handlers: 附加到事件循环的其他socket及其可读回调 {socket: func}
     """
     
     # Qt信号定义
     cmd_send_signal = pyqtSignal([str, str])    # 命令发送信号
     ready_signal = pyqtSignal([bool, str])       # 服务器就绪信号
 
+    RECV_SIZE = 65536        # 单次接收的最大字节数
+    SOCK_BUF_SIZE = 1 << 20  # 客户端socket收发缓冲区大小
+
     def __init__(self, addr:str=None, port=8888, func=lambda x: print(x)):
         """
         初始化TCP服务器
         
         Args:
-            addr: 服务器绑定地址，默认为本机IP
+            addr: 服务器显示地址，默认在服务器线程启动时解析为本机IP
             port: 监听端口，默认8888
-            func: 请求处理回调函数，接收请求字符串，返回响应字符串
+            func: 请求处理回调函数，接收请求数据(UTF-8编码的bytes/bytearray，
+                  可直接交给json.loads)，返回响应字符串
         """
         super(TCPServer, self).__init__()
-        self.host = addr if addr else socket.gethostbyname(socket.gethostname())
+        # 未指定地址时不在此处解析主机名（可能因DNS阻塞GUI线程），推迟到服务器线程中
+        self.host = addr
         self.port = int(port)
         self.func = func
         self.recQueues = {}
@@ -72,51 +79,102 @@ class TCPServer(QThread):
         # 服务器运行状态标志
         self._is_running = True
         self.server_socket = None
-        self.client_threads = {}   # 客户端线程字典 {addr: thread}
+        self._selector = None      # 服务器线程的事件循环
         self.client_sockets = []   # 客户端socket列表
+        self.socket_handlers = {}  # 附加socket的可读回调 {socket: func}
+        # 所有客户端在同一线程内处理，共用一块预分配的接收缓冲区
+        self._rbuf = bytearray(self.RECV_SIZE)
+        self._rmv = memoryview(self._rbuf)
+        # 唤醒事件循环用的socket对，close_tcp_server写入一个字节即可解除select阻塞
+        self._wakeup_r, self._wakeup_w = socket.socketpair()
+        self._wakeup_r.setblocking(False)
 
-    def handle_client_connection(self, client_socket, addr):
-        """处理客户端连接"""
+    @staticmethod
+    def resolve_host():
+        """解析本机IP地址，仅用于显示；服务器实际绑定在所有网卡上"""
         try:
-            buffer = b""
-            while self._is_running:
-                try:
-                    client_socket.settimeout(1)  # 设置超时以便定期检查关闭标志
-                    data = client_socket.recv(1024)
-                    if not data:  # 连接关闭
-                        break
-                    
-                    # print(f"接收到来自{addr}的数据: {data.decode('utf-8')}")
-                    buffer += data
-                    
-                    if b'\n' in buffer:
-                        messages = buffer.split(b'\n')
-                        for message in messages[:-1]:
-                            a = self.func(message.decode('utf-8'))
-                            self.send(client_socket, a)  
-                        buffer = messages[-1]
-                        
-                except socket.timeout:
-                    continue  # 超时后继续循环以检查关闭标志
-                except Exception as e:
-                    print(f"{addr}:客户端连接异常: {e}")
-                    break
-                    
-            # 处理剩余未处理的消息
-            if buffer:
-                self.server_handler(client_socket, buffer)
-                
-        finally:
+            return socket.gethostbyname(socket.gethostname())
+        except OSError:
+            return "0.0.0.0"
+
+    def add_socket_handler(self, sock, func):
+        """将其他socket（如局域网发现的UDP socket）加入服务器事件循环
+        
+        需在start()之前调用。socket可读时在服务器线程中调用func(sock)，
+        服务器关闭时socket随之关闭。
+        
+        Args:
+            sock: 要监听的socket
+            func: 可读回调函数，参数为socket
+        """
+        self.socket_handlers[sock] = func
+
+    def accept_client(self):
+        """接受新的客户端连接并注册到事件循环"""
+        client_socket, addr = self.server_socket.accept()
+        print(f"接受到来自{addr}的连接")
+        # 关闭Nagle算法，应答立即发出；放大收发缓冲区减少系统调用
+        client_socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        client_socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, self.SOCK_BUF_SIZE)
+        client_socket.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, self.SOCK_BUF_SIZE)
+        self.client_sockets.append(client_socket)
+        # 客户端地址和未处理完的接收数据直接保存在selector的key.data中
+        self._selector.register(client_socket, selectors.EVENT_READ, data=(addr, bytearray()))
+
+    def handle_client_data(self, client_socket, addr, buffer):
+        """处理客户端可读事件，按换行符分帧后逐条处理
+        
+        Args:
+            client_socket: 可读的客户端socket
+            addr: 客户端地址
+            buffer: 该客户端未处理完的接收数据(bytearray)，原地更新
+        """
+        try:
+            n = client_socket.recv_into(self._rbuf)
+            if not n:  # 连接关闭
+                # 处理剩余未处理的消息
+                if buffer:
+                    self.server_handler(client_socket, buffer)
+                print(f"关闭来自{addr}的连接")
+                self.cleanup_client(client_socket, addr)
+                return
+
+            # print(f"接收到来自{addr}的数据: {bytes(self._rmv[:n]).decode('utf-8')}")
+            buffer += self._rmv[:n]
+
+            # 从偏移处逐个查找换行符分帧，不构造消息列表，处理完后一次性删除已消费的数据；
+            # 消息以字节串直接交给func，不在此处解码
+            end = buffer.find(b'\n')
+            if end == -1:
+                return
+            # 同一次接收到的多条命令的应答合并为一次sendall发出
+            out = bytearray()
+            start = 0
+            try:
+                while end != -1:
+                    out += self.func(buffer[start:end]).encode('utf-8')
+                    out += b'\n'
+                    start = end + 1
+                    end = buffer.find(b'\n', start)
+            except Exception:
+                # 某条命令处理出错时，先发出之前已处理命令的应答，再由外层关闭连接
+                if out:
+                    self.send(client_socket, out)
+                raise
+            del buffer[:start]
+            self.send(client_socket, out)
+
+        except Exception as e:
+            print(f"{addr}:客户端连接异常: {e}")
             print(f"关闭来自{addr}的连接")
             self.cleanup_client(client_socket, addr)
 
     def server_handler(self, client_socket, buffer):
         """处理客户端数据"""
         try:
-            data = buffer.decode('utf-8')
-            if data:
-                a = self.func(data)
-                self.send(client_socket, a)
+            if buffer:
+                a = self.func(bytes(buffer))
+                self.send(client_socket, a.encode('utf-8') + b'\n')
         except Exception as e:
             print(f"处理客户端数据时出错: {e}")
 
@@ -125,8 +183,8 @@ class TCPServer(QThread):
         try:
             if client_socket in self.client_sockets:
                 self.client_sockets.remove(client_socket)
-            if addr in self.client_threads:
-                del self.client_threads[addr]
+            if self._selector is not None:
+                self._selector.unregister(client_socket)
             client_socket.shutdown(socket.SHUT_RDWR)
             client_socket.close()
         except Exception as e:
@@ -136,56 +194,64 @@ class TCPServer(QThread):
         """
         启动TCP服务器主循环
         
-        创建服务器socket，监听指定端口，接受客户端连接。
-        每个客户端连接创建独立的处理线程。
+        创建服务器socket，监听指定端口，在同一线程内通过selectors
+        事件循环接受客户端连接并处理客户端数据。
         """
         print("启动TCP服务器")
+        if not self.host:
+            self.host = self.resolve_host()
         print(f"本机IP地址: {self.host}")
         print(f"端口号: {self.port}")
 
-        # 检查端口是否被占用
-        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-            result = s.connect_ex((self.host, self.port))
-            if result == 0:
-                print(f"端口{self.port}已被占用，请更换端口")
-                self.ready_signal.emit(False, "端口已被占用，请更换端口")
-                return
-
         self.server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        self.server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-        self.server_socket.bind(('', self.port))
-        self.server_socket.settimeout(1)  # 设置超时以便定期检查关闭标志
-        self.server_socket.listen(5)
+        if hasattr(socket, "SO_EXCLUSIVEADDRUSE"):
+            # Windows下SO_REUSEADDR允许绑定已被监听的端口，改用独占绑定才能检测端口占用
+            self.server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_EXCLUSIVEADDRUSE, 1)
+        else:
+            self.server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        # 直接尝试绑定来判断端口是否被占用
+        try:
+            self.server_socket.bind(('', self.port))
+            self.server_socket.listen(5)
+        except OSError as e:
+            print(f"端口{self.port}已被占用，请更换端口: {e}")
+            self.ready_signal.emit(False, "端口已被占用，请更换端口")
+            self.cleanup_server()
+            return
+        self._selector = selectors.DefaultSelector()
+        self._selector.register(self.server_socket, selectors.EVENT_READ)
+        for sock in self.socket_handlers:
+            self._selector.register(sock, selectors.EVENT_READ)
+        self._selector.register(self._wakeup_r, selectors.EVENT_READ)
         print(f"服务器正在{self.host}:{self.port}上监听...")
         self.ready_signal.emit(True, f"服务器正在{self.host}:{self.port}上监听...")
 
-        self._is_running = True
-        
         try:
             while self._is_running:
-                try:
-                    client_socket, addr = self.server_socket.accept()
-                    print(f"接受到来自{addr}的连接")
-                    
-                    # 存储客户端socket
-                    self.client_sockets.append(client_socket)
-                    
-                    # 为每个客户端连接创建一个单独的线程来处理
-                    client_thread = threading.Thread(
-                        target=self.handle_client_connection, 
-                        args=(client_socket, addr),
-                        daemon=True
-                    )
-                    self.client_threads[addr] = client_thread
-                    client_thread.start()
-                    
-                except socket.timeout:
-                    continue  # 超时后继续循环以检查关闭标志
-                except Exception as e:
-                    print(f"连接异常: {e}")
+                # 无超时阻塞等待，关闭时由唤醒socket解除阻塞
+                for key, _ in self._selector.select():
+                    if key.fileobj is self._wakeup_r:
+                        self._drain_wakeup()
+                    elif key.fileobj is self.server_socket:
+                        try:
+                            self.accept_client()
+                        except Exception as e:
+                            print(f"连接异常: {e}")
+                    elif key.fileobj in self.socket_handlers:
+                        self.socket_handlers[key.fileobj](key.fileobj)
+                    else:
+                        self.handle_client_data(key.fileobj, *key.data)
         finally:
             self.cleanup_server()
 
+    def _drain_wakeup(self):
+        """读空唤醒socket中的数据"""
+        try:
+            while self._wakeup_r.recv(64):
+                pass
+        except BlockingIOError:
+            pass
+
     def cleanup_server(self):
         """清理服务器资源"""
         print("正在关闭服务器...")
@@ -200,7 +266,19 @@ class TCPServer(QThread):
         
         # 清空客户端列表
         self.client_sockets.clear()
-        self.client_threads.clear()
+
+        # 关闭附加的socket
+        for sock in self.socket_handlers:
+            try:
+                sock.close()
+            except Exception as e:
+                print(f"关闭附加socket时出错: {e}")
+        self.socket_handlers.clear()
+        if self._selector is not None:
+            self._selector.close()
+            self._selector = None
+        for sock in (self._wakeup_r, self._wakeup_w):
+            sock.close()
         
         # 关闭服务器socket
         if self.server_socket:
@@ -218,22 +296,22 @@ class TCPServer(QThread):
         print("正在请求关闭TCP服务器...")
         self._is_running = False
         
-        # 如果服务器socket阻塞在accept()，需要先关闭它
-        if self.server_socket:
-            try:
-                # 创建一个临时socket连接到服务器以解除accept()阻塞
-                temp_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-                temp_socket.connect((self.host, self.port))
-                temp_socket.close()
-            except Exception as e:
-                print(f"创建临时连接时出错: {e}")
+        # 向唤醒socket写入一个字节，解除事件循环的select()阻塞
+        try:
+            self._wakeup_w.send(b"\0")
+        except OSError as e:
+            print(f"唤醒服务器事件循环时出错: {e}")
 
     def send(self, client_socket, data):
-        """向客户端发送数据"""
+        """向客户端发送数据
+        
+        Args:
+            client_socket: 客户端socket
+            data: 已编码且以换行符结尾的应答数据(bytes/bytearray)
+        """
         try:
-            data = data + "\n"
             # print(f"向{client_socket.getpeername()}发送数据: {data}")
-            client_socket.sendall(data.encode('utf-8'))
+            client_socket.sendall(data)
         except Exception as e:
             print(f"向{client_socket.getpeername()}发送数据异常: {e}")
 
@@ -21,12 +21,13 @@ def read_config():
     """
     config = configparser.ConfigParser()
     try:
-        if not os.path.exists(config_path):
-            print(f"配置文件 {config_path} 不存在")
-            return None
-        
-        config.read(config_path)
+        # 只打开一次文件，不再单独检查文件是否存在
+        with open(config_path, 'r', encoding='utf-8') as f:
+            config.read_file(f)
         return config
+    except FileNotFoundError:
+        print(f"配置文件 {config_path} 不存在")
+        return None
     except Exception as e:
         print(f"读取配置文件时出错: {e}")
         return None
@@ -61,10 +62,30 @@ def edit_config(section, key, value):
         config.set(section, key, value)
         
         # 写入文件
-        with open(config_path, 'w') as configfile:
+        return write_config(config)
+    except Exception as e:
+        print(f"编辑配置文件时出错: {e}")
+        return False
+
+def write_config(config):
+    """
+    将配置对象整体写入配置文件
+    
+    参数:
+        config (configparser.ConfigParser): 要写入的配置对象
+        
+    返回:
+        bool: 操作是否成功
+        
+    示例:
+        config = read_config()
+        config.set('Port', 'name', 'COM3')
+        success = write_config(config)
+    """
+    try:
+        with open(config_path, 'w', encoding='utf-8') as configfile:
             config.write(configfile)
-            
         return True
     except Exception as e:
-        print(f"编辑配置文件时出错: {e}")
+        print(f"写入配置文件时出错: {e}")
         return False
\ No newline at end of file